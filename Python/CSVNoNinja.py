@@ -1,4 +1,5 @@
 import sys
+import codecs
 import subprocess
 import importlib.util
 import ctypes
@@ -12,16 +13,19 @@ import getpass
 
 def ensure_pandas_installed():
     """
-    Check if 'pandas' can be imported. If not, attempts to install via PowerShell pip.
+    Check if 'pandas' can be imported. If not, attempts to install it with this
+    interpreter's pip.
     Exits on error.
     """
     if importlib.util.find_spec("pandas") is None:
         print("Module 'pandas' not found. Attempting to install via pip...")
         try:
+            # Run pip through this interpreter so the install lands where we import from
             subprocess.check_call([
-                "powershell",
-                "-Command",
-                "pip install pandas"
+                sys.executable, "-m", "pip", "install",
+                "--disable-pip-version-check",
+                "--no-input",
+                "pandas"
             ])
         except subprocess.CalledProcessError as e:
             print(f"Failed to install 'pandas'. Error:\n{e}")
@@ -41,7 +45,8 @@ def ensure_pandas_installed():
 # SECTION 2: Define Windows constants & structures for file dialogs
 #
 
-MAX_PATH = 260
+# Long-path limit, so paths over the classic MAX_PATH (260) aren't truncated
+MAX_FILE_BUFFER = 32768
 
 OFN_FILEMUSTEXIST      = 0x00001000
 OFN_PATHMUSTEXIST      = 0x00000800
@@ -79,6 +84,28 @@ class OPENFILENAMEW(ctypes.Structure):
         ("FlagsEx",           wintypes.DWORD),
     ]
 
+# Declare the signatures up front so ctypes checks/marshals arguments directly
+GetOpenFileNameW.argtypes = [ctypes.POINTER(OPENFILENAMEW)]
+GetOpenFileNameW.restype = wintypes.BOOL
+GetSaveFileNameW.argtypes = [ctypes.POINTER(OPENFILENAMEW)]
+GetSaveFileNameW.restype = wintypes.BOOL
+
+# Shared by both dialogs and reset on each call, instead of reallocated every time
+_FILE_BUF = (ctypes.c_wchar * MAX_FILE_BUFFER)()
+_OFN = OPENFILENAMEW()
+
+def _reset_dialog_state():
+    """
+    Clears the shared OPENFILENAMEW and file buffer, points them at each other
+    and returns the structure ready for a dialog call.
+    """
+    ctypes.memset(ctypes.byref(_OFN), 0, ctypes.sizeof(_OFN))
+    ctypes.memset(_FILE_BUF, 0, ctypes.sizeof(_FILE_BUF))
+    _OFN.lStructSize = ctypes.sizeof(_OFN)
+    _OFN.lpstrFile = ctypes.cast(_FILE_BUF, wintypes.LPWSTR)
+    _OFN.nMaxFile = MAX_FILE_BUFFER
+    return _OFN
+
 #
 # SECTION 3: Native Windows Open/Save dialogs (classic style, no tkinter)
 #
@@ -93,13 +120,8 @@ def windows_file_dialog_open(
     Returns the chosen path or None if user cancels.
     filter_str example: "CSV Files\0*.csv\0All Files\0*.*\0\0"
     """
-    ofn = OPENFILENAMEW()
-    ofn.lStructSize = ctypes.sizeof(ofn)
-
-    # Prepare a wide-char buffer for the file name
-    file_buffer = (ctypes.c_wchar * MAX_PATH)()
-    ofn.lpstrFile = ctypes.cast(file_buffer, wintypes.LPWSTR)
-    ofn.nMaxFile = MAX_PATH
+    # Shared structure, already wired to the wide-char file name buffer
+    ofn = _reset_dialog_state()
 
     # Filter, e.g. "CSV Files\0*.csv\0All Files\0*.*\0\0"
     ofn.lpstrFilter = filter_str
@@ -116,7 +138,7 @@ def windows_file_dialog_open(
 
     success = GetOpenFileNameW(ctypes.byref(ofn))
     if success:
-        return file_buffer.value  # The chosen file path
+        return _FILE_BUF.value  # The chosen file path
     return None  # user canceled or error
 
 
@@ -130,19 +152,14 @@ def windows_file_dialog_save(
     Opens a classic Windows 'Save File' dialog.
     Returns the chosen file path or None if user cancels.
     """
-    ofn = OPENFILENAMEW()
-    ofn.lStructSize = ctypes.sizeof(ofn)
+    ofn = _reset_dialog_state()
 
-    file_buffer = (ctypes.c_wchar * MAX_PATH)()
     # If you have a default filename, set it here
     if default_filename:
-        # We can't just assign a Python string to file_buffer;
-        # we need to copy it in or do file_buffer.value = default_filename
+        # We can't just assign a Python string to the buffer pointer;
+        # we need to copy it in with _FILE_BUF.value = default_filename
         # ensuring we don't exceed buffer length.
-        file_buffer.value = default_filename
-
-    ofn.lpstrFile = ctypes.cast(file_buffer, wintypes.LPWSTR)
-    ofn.nMaxFile = MAX_PATH
+        _FILE_BUF.value = default_filename
 
     ofn.lpstrFilter = filter_str
     ofn.nFilterIndex = 1
@@ -156,12 +173,191 @@ def windows_file_dialog_save(
 
     success = GetSaveFileNameW(ctypes.byref(ofn))
     if success:
-        return file_buffer.value
+        return _FILE_BUF.value
     return None
 
 
 #
-# SECTION 4: Main Logic — read CSV, exclude Ninja, save
+# SECTION 4: CSV loading
+#
+
+# Columns the filtering needs; any others are carried through to the output
+REQUIRED_COLS = ["IP", "HostName", "Name"]
+
+# Rows parsed per chunk, so memory stays flat on multi-GB exports
+CHUNK_SIZE = 200_000
+
+# Bytes sniffed from the start of the CSV to pick its encoding
+SNIFF_SIZE = 64 * 1024
+
+def sniff_encoding(input_csv):
+    """
+    Guesses the CSV encoding from its first SNIFF_SIZE bytes.
+    Returns 'utf-8-sig' for a UTF-8 BOM, 'utf-8' if the bytes hold non-ASCII
+    that decodes as UTF-8, and the Windows-likely 'cp1252' if they don't.
+    Returns None if the bytes are pure ASCII, which says nothing either way.
+    """
+    with open(input_csv, "rb") as f:
+        head = f.read(SNIFF_SIZE)
+
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.isascii():
+        return None
+    try:
+        # Incremental, so a multi-byte character cut off by the sniff isn't an error
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=len(head) < SNIFF_SIZE)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+def read_input_csv(pd, input_csv, encoding):
+    """
+    Streams the CSV, CHUNK_SIZE rows at a time.
+    Parses with the C engine (the pyarrow engine can't stream chunks).
+    Every column loads as text (a pyarrow string when pyarrow is installed),
+    so values are written back out exactly as they were read and no chunk
+    infers a different type for a column.
+    """
+    text = 'string[pyarrow]' if importlib.util.find_spec("pyarrow") is not None else str
+
+    with pd.read_csv(
+        input_csv,
+        encoding=encoding,
+        engine="c",
+        dtype=text,
+        chunksize=CHUNK_SIZE
+    ) as reader:
+        yield from reader
+
+
+# Substring that marks a host as already running Ninja
+NINJA_NEEDLE = "NinjaRMMAgent"
+
+# Working column for the Ninja flag, dropped again before the output is written
+NINJA_COL = "_HasNinjaRMMAgent"
+
+# Inputs smaller than this aren't worth the Numba kernel: it saves ~35ns a row
+# but loading it costs ~0.3s even from its on-disk cache (~1s to first compile)
+NUMBA_MIN_BYTES = 1 << 30
+
+# None until first use, False once it turned out to be unusable
+_substring_kernel = None
+
+def get_substring_kernel():
+    """
+    Returns the Numba-compiled substring scan, compiling it on first use
+    (cached on disk, so later runs skip the JIT). Returns None if numba
+    isn't installed or the kernel failed before.
+    """
+    global _substring_kernel
+    if _substring_kernel is None and importlib.util.find_spec("numba") is not None:
+        import numba
+        import numpy as np
+
+        @numba.njit(parallel=True, cache=True)
+        def contains_needle(offsets, data, needle):
+            # Row i is data[offsets[i]:offsets[i + 1]], scanned for needle bytes
+            out = np.zeros(len(offsets) - 1, dtype=np.bool_)
+            m = len(needle)
+            for i in numba.prange(len(offsets) - 1):
+                last = offsets[i + 1] - m
+                j = offsets[i]
+                while j <= last:
+                    k = 0
+                    while k < m and data[j + k] == needle[k]:
+                        k += 1
+                    if k == m:
+                        out[i] = True
+                        break
+                    j += 1
+            return out
+
+        _substring_kernel = contains_needle
+    return _substring_kernel or None
+
+def find_ninja_rows(names, use_kernel=False):
+    """
+    Returns a boolean mask of the rows whose Name contains NINJA_NEEDLE.
+    With use_kernel (large inputs), pyarrow-backed columns are scanned by the
+    Numba kernel straight over the Arrow offsets/data buffers; everything else
+    uses str.contains.
+    """
+    global _substring_kernel
+    kernel = None
+    if use_kernel and getattr(names.dtype, "storage", None) == "pyarrow":
+        kernel = get_substring_kernel()
+    if kernel is not None:
+        try:
+            return scan_with_kernel(kernel, names)
+        except Exception:
+            # e.g. its on-disk cache won't load; str.contains gives the same
+            # answer, so stop trying the kernel for the rest of the run
+            _substring_kernel = False
+    return names.str.contains(NINJA_NEEDLE, na=False, regex=False)
+
+def scan_with_kernel(kernel, names):
+    """
+    Runs the Numba substring kernel over each Arrow chunk of a pyarrow-backed
+    string Series and returns the combined boolean mask.
+    """
+    import numpy as np
+    import pyarrow as pa
+
+    arrow = pa.array(names.array)
+    chunks = arrow.chunks if isinstance(arrow, pa.ChunkedArray) else [arrow]
+    needle = np.frombuffer(NINJA_NEEDLE.encode("utf-8"), dtype=np.uint8)
+    masks = []
+    for arr in chunks:
+        _, offsets_buf, data_buf = arr.buffers()
+        offset_type = np.int64 if pa.types.is_large_string(arr.type) else np.int32
+        offsets = np.frombuffer(offsets_buf, dtype=offset_type)[arr.offset:arr.offset + len(arr) + 1]
+        data = np.frombuffer(data_buf, dtype=np.uint8) if data_buf is not None else np.zeros(0, np.uint8)
+        # Nulls never match, whatever bytes their slots happen to span
+        valid = ~arr.is_null().to_numpy(zero_copy_only=False)
+        masks.append(kernel(offsets, data, needle) & valid)
+    return np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+
+def flag_ninja_hosts(frame):
+    """
+    Sets NINJA_COL on every row of a host where any of that host's rows has it,
+    using a single groupby over (IP, HostName).
+    """
+    frame[NINJA_COL] = frame.groupby(
+        ['IP', 'HostName'], sort=False, dropna=False
+    )[NINJA_COL].transform('any')
+    return frame
+
+def summarize_hosts(chunk, use_kernel=False):
+    """
+    Collapses a chunk to each host's first row, kept as-is, plus NINJA_COL
+    saying whether any of that host's rows is a NinjaRMMAgent.
+    """
+    flagged = flag_ninja_hosts(chunk.assign(**{NINJA_COL: find_ninja_rows(chunk['Name'], use_kernel)}))
+    return flagged.drop_duplicates(subset=['IP', 'HostName'])
+
+
+def write_output_csv(frame, save_csv):
+    """
+    Writes the filtered DataFrame to CSV.
+    Uses pyarrow's C++ CSV writer when pyarrow is installed, otherwise to_csv.
+    pyarrow quotes every string field, to_csv only the ones that need it.
+    """
+    if importlib.util.find_spec("pyarrow") is None:
+        frame.to_csv(save_csv, index=False)
+        return
+
+    import pyarrow as pa
+    import pyarrow.csv as pv
+
+    # All plain strings, so columns write as text whatever dtypes they parsed as
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    table = table.cast(pa.schema([(col, pa.string()) for col in table.column_names]))
+    pv.write_csv(table, save_csv, write_options=pv.WriteOptions(batch_size=64_000))
+
+
+#
+# SECTION 5: Main Logic — read CSV, exclude Ninja, save
 #
 
 def main():
@@ -180,31 +376,57 @@ def main():
         print("No file selected. Exiting.")
         sys.exit(0)
 
-    # 3) Try reading the CSV (assuming Windows-likely cp1252 encoding)
+    # 3) Try reading the CSV (UTF-8 if it looks like it, else Windows-likely cp1252)
     try:
-        df = pd.read_csv(input_csv, encoding="cp1252", engine="python")
+        # If the start of the file is inconclusive, try UTF-8; the pass below
+        # falls back to cp1252 if that turns out wrong further in
+        encoding = sniff_encoding(input_csv) or "utf-8"
+        # Only the header first, so missing columns get a friendly message
+        header = pd.read_csv(input_csv, encoding=encoding, nrows=0)
     except Exception as e:
         print(f"Error reading CSV from {input_csv}:\n{e}")
         sys.exit(1)
 
     # Validate required columns exist to avoid KeyError later
-    required_cols = {"Name", "IP", "HostName"}
-    missing = required_cols.difference(df.columns)
+    missing = set(REQUIRED_COLS).difference(header.columns)
     if missing:
         print(f"CSV missing expected column(s): {', '.join(sorted(missing))}")
         sys.exit(1)
 
-    # 4) Exclude any host that has "NinjaRMMAgent"
-    #    4a) Find the (IP, HostName) combos with NinjaRMMAgent
-    ninja_mask = df['Name'].str.contains("NinjaRMMAgent", na=False)
-    hosts_with_ninja = df.loc[ninja_mask, ['IP', 'HostName']].drop_duplicates()
+    # Only big inputs have enough rows to pay for loading the Numba kernel
+    use_kernel = os.path.getsize(input_csv) >= NUMBA_MIN_BYTES
 
-    #    4b) Merge as an anti-join: exclude all rows for those hosts
-    merged = df.merge(hosts_with_ninja, on=['IP','HostName'], how='left', indicator=True)
-    df_no_ninja = merged[merged['_merge'] == 'left_only'].drop(columns='_merge')
+    # 4) One pass: reduce each chunk to one row per (IP, HostName), noting if any
+    #    of that host's rows has NinjaRMMAgent
+    try:
+        try:
+            chunk_summaries = [
+                summarize_hosts(chunk, use_kernel) for chunk in read_input_csv(pd, input_csv, encoding)
+            ]
+        except UnicodeDecodeError:
+            if encoding == "cp1252":
+                raise
+            # Not UTF-8 after all (past the sniffed bytes), redo the pass as cp1252
+            encoding = "cp1252"
+            chunk_summaries = [
+                summarize_hosts(chunk, use_kernel) for chunk in read_input_csv(pd, input_csv, encoding)
+            ]
+    except Exception as e:
+        print(f"Error reading CSV from {input_csv}:\n{e}")
+        sys.exit(1)
 
-    #    4c) (Optionally) only keep one row per host
-    df_no_ninja_unique = df_no_ninja.drop_duplicates(subset=['IP', 'HostName'])
+    #    Fold the chunk summaries together once; chunks stay in file order,
+    #    so each host keeps its first row in the file
+    if not chunk_summaries:
+        hosts_no_ninja = pd.DataFrame(columns=header.columns)
+    else:
+        hosts = pd.concat(chunk_summaries, ignore_index=True)
+
+        #    Exclude every host that has NinjaRMMAgent (nothing to drop if none do)
+        if hosts[NINJA_COL].any():
+            hosts = flag_ninja_hosts(hosts)
+            hosts = hosts[~hosts[NINJA_COL]]
+        hosts_no_ninja = hosts.drop_duplicates(subset=['IP', 'HostName']).drop(columns=NINJA_COL)
 
     # 5) Prepare a default output path in the user’s Downloads folder
     current_user = getpass.getuser()
@@ -225,12 +447,11 @@ def main():
 
     # 7) Write out the final filtered CSV
     try:
-        df_no_ninja_unique.to_csv(save_csv, index=False)
+        write_output_csv(hosts_no_ninja, save_csv)
         print(f"Filtered CSV saved to: {save_csv}")
     except Exception as e:
         print(f"Failed to save CSV: {e}")
         sys.exit(1)
 
-
 if __name__ == "__main__":
     main()
@@ -2,25 +2,130 @@
 
 import os
 
+# Copy buffer size for streaming each file into the output
+COPY_BUFFER_SIZE = 1 << 20
+
+# Max bytes per os.sendfile call
+SENDFILE_CHUNK = 1 << 30
+
+def write_all(outfile, data):
+    # The output is unbuffered, and a raw write may take fewer bytes than given
+    view = memoryview(data)
+    while view:
+        view = view[outfile.write(view):]
+
+def copy_contents(infile, outfile, size):
+    # Copy the first size bytes of infile (its size when the folder was listed)
+    # into outfile; in-kernel with os.sendfile where available (no user-space
+    # buffer), otherwise through a fixed-size buffer. The cap means a file that
+    # keeps growing while it's copied can't keep the copy going forever
+    offset = 0
+    if hasattr(os, "sendfile"):
+        out_pos = outfile.tell()
+        try:
+            while offset < size:
+                count = min(size - offset, SENDFILE_CHUNK)
+                sent = os.sendfile(outfile.fileno(), infile.fileno(), offset, count)
+                if sent == 0:
+                    break
+                offset += sent
+                out_pos += sent
+            outfile.seek(out_pos)
+            return
+        except OSError:
+            # e.g. unsupported by this filesystem, finish the copy the portable way
+            outfile.seek(out_pos)
+    infile.seek(offset)
+    while offset < size:
+        buf = infile.read(min(size - offset, COPY_BUFFER_SIZE))
+        if not buf:
+            break
+        write_all(outfile, buf)
+        offset += len(buf)
+
+def strip_trailing_newlines(outfile, start):
+    # Walk back over the newlines at the end of what was just copied, so the next
+    # write overwrites them (the file itself is trimmed once, at the very end).
+    # CR counts too, like the old text-mode read that turned \r\n and \r into \n
+    pos = outfile.tell()
+    while pos > start:
+        outfile.seek(pos - 1)
+        if outfile.read(1) not in (b"\n", b"\r"):
+            break
+        pos -= 1
+    outfile.seek(pos)
+
+def preallocate(outfile, size):
+    # Reserve the whole output up front so the filesystem doesn't extend it
+    # on every write; the final truncate trims whatever ends up unused
+    if size <= 0:
+        return
+    try:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(outfile.fileno(), 0, size)
+        else:
+            # On Windows this moves the end of file (SetEndOfFile) in one step
+            outfile.truncate(size)
+    except OSError:
+        # Only an optimization, the writes will still grow the file as needed
+        pass
+
+def file_header(name):
+    # The file name in bold (Markdown-style). Headers and line breakers use the
+    # platform line ending (CRLF on Windows) like the old text-mode output did;
+    # file contents themselves are copied byte-for-byte
+    nl = os.linesep
+    return f"**{name}**{nl}{nl}".encode("utf-8")
+
+def is_output_file(entry, out_stat):
+    # True if entry is the output file itself (e.g. a merged_file.txt left in the
+    # folder by an earlier run). DirEntry.stat() leaves st_ino/st_dev at zero on
+    # Windows, so stat the path for real there
+    st = os.stat(entry.path) if os.name == "nt" else entry.stat()
+    return os.path.samestat(st, out_stat)
+
 def merge_files_in_folder(folder_path, output_file="merged_file.txt"):
-    # Get a list of all items in the folder, sorted alphabetically
-    items = sorted(os.listdir(folder_path))
-
-    with open(output_file, "w", encoding="utf-8") as outfile:
-        for item in items:
-            file_path = os.path.join(folder_path, item)
-            
-            # Check only files (skip directories)
-            if os.path.isfile(file_path):
+    # Get all files in the folder (skip directories), sorted alphabetically
+    with os.scandir(folder_path) as it:
+        entries = sorted((e for e in it if e.is_file()), key=lambda e: e.name)
+
+    # Line breaker between files, with the platform line ending like the header
+    nl = os.linesep
+    separator = f"{nl}{nl}---{nl}{nl}".encode("utf-8")
+
+    # Binary mode so file contents are copied as-is without a decode/encode pass.
+    # Unbuffered, since os.sendfile writes to the fd directly: a buffered file
+    # object could skip the seek before it or serve stale read-ahead after it
+    with open(output_file, "w+b", buffering=0) as outfile:
+        # Never merge the output into itself, it would read back its own
+        # header and preallocated zeros
+        out_stat = os.fstat(outfile.fileno())
+        entries = [e for e in entries if not is_output_file(e, out_stat)]
+
+        # Upper bound on the output size: every header, file and line breaker
+        total_size = sum(
+            len(file_header(e.name)) + e.stat().st_size + len(separator)
+            for e in entries
+        )
+        preallocate(outfile, total_size)
+
+        try:
+            for entry in entries:
                 # Write the file name in bold (Markdown-style)
-                outfile.write(f"**{item}**\n\n")
+                write_all(outfile, file_header(entry.name))
                 
-                # Write the file's content
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as infile:
-                    outfile.write(infile.read().rstrip("\n"))
+                # Copy the file's content
+                content_start = outfile.tell()
+                with open(entry.path, "rb") as infile:
+                    copy_contents(infile, outfile, entry.stat().st_size)
+                strip_trailing_newlines(outfile, content_start)
                 
                 # Write a line breaker before the next file
-                outfile.write("\n\n---\n\n")
+                write_all(outfile, separator)
+        finally:
+            # Drop any preallocated space (and stripped newlines) past the last
+            # write, even if a file failed partway
+            outfile.truncate()
 
 if __name__ == "__main__":
     # Prompt for directory path